@@ -1,12 +1,15 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from ib_async import IB, Stock, Option, util
 import asyncio
+import bisect
 import logging
 import math
+import time
+import orjson
 from typing import List, Optional
-from scipy.stats import norm
 
 def safe_float(val):
     """将 nan/inf 转换为 None，确保 JSON 可序列化"""
@@ -16,64 +19,189 @@ def safe_float(val):
         return None
     return val
 
-def estimate_strike_from_delta(stock_price: float, target_delta: float, days_to_exp: int,
-                                iv: float = 0.3, is_call: bool = True) -> float:
-    """
-    使用 Black-Scholes 公式反推给定 Delta 对应的 Strike
+_isfinite = math.isfinite
 
-    Delta = N(d1) for Call, Delta = N(d1) - 1 for Put
-    d1 = (ln(S/K) + (r + σ²/2)T) / (σ√T)
+def _sf(val):
+    """safe_float 的快速版本，用于逐行构建期权数据的热循环"""
+    if val is None or (type(val) is float and not _isfinite(val)):
+        return None
+    return val
 
-    反推: K = S * exp(-(d1 * σ√T - (r + σ²/2)T))
+_NO_GREEKS = (None,) * 5
+
+def _option_row(opt, ticker, is_call: bool, itm: bool) -> dict:
+    """将单个期权合约及其 ticker 转换为返回给前端的数据行"""
+    # 每行只读取一次属性，避免重复查找
+    bid, ask, last, volume = ticker.bid, ticker.ask, ticker.last, ticker.volume
+    mg = ticker.modelGreeks
+    delta, gamma, theta, vega, iv = (mg.delta, mg.gamma, mg.theta, mg.vega, mg.impliedVol) if mg else _NO_GREEKS
+
+    return {
+        "strike": opt.strike,
+        "expiration": opt.lastTradeDateOrContractMonth,
+        "bid": _sf(bid) if bid != -1 else None,
+        "ask": _sf(ask) if ask != -1 else None,
+        "last": _sf(last) if last != -1 else None,
+        "volume": _sf(volume) if volume != -1 else 0,
+        "openInterest": _sf(ticker.callOpenInterest if is_call else ticker.putOpenInterest),
+        # Greeks
+        "delta": _sf(delta),
+        "gamma": _sf(gamma),
+        "theta": _sf(theta),
+        "vega": _sf(vega),
+        "iv": _sf(iv),
+        # ITM/OTM 状态
+        "itm": itm
+    }
+
+def find_atm_index(sorted_strikes: list, stock_price: float) -> int:
+    """在已排序的行权价列表中二分查找最接近股价的下标（距离相同时取较低的行权价）"""
+    i = bisect.bisect_left(sorted_strikes, stock_price)
+    if i == 0:
+        return 0
+    if i == len(sorted_strikes):
+        return len(sorted_strikes) - 1
+    if sorted_strikes[i] - stock_price < stock_price - sorted_strikes[i - 1]:
+        return i
+    return i - 1
+
+def strikes_in_range(sorted_strikes: list, low: float, high: float) -> list:
+    """返回已排序行权价列表中落在 [low, high] 闭区间内的连续切片"""
+    return sorted_strikes[bisect.bisect_left(sorted_strikes, low):bisect.bisect_right(sorted_strikes, high)]
+
+# Acklam 逆正态分布有理逼近系数（相对误差 < 1.15e-9）
+_ACKLAM_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_ACKLAM_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01)
+_ACKLAM_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_ACKLAM_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00)
+_ACKLAM_P_LOW = 0.02425
+
+_SQRT_2 = math.sqrt(2.0)
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+_HALLEY_P_MIN = 1e-300
+
+def _inv_norm(p: float) -> float:
     """
+    标准正态分布 CDF 的反函数 N^(-1)(p)，纯 Python 实现，避免依赖 scipy
+
+    先用 Acklam 有理逼近得到初值，再用 math.erfc 做一步 Halley 迭代修正
+    """
+    if p <= 0.0:
+        return -math.inf
+    if p >= 1.0:
+        return math.inf
+
+    a, b, c, d = _ACKLAM_A, _ACKLAM_B, _ACKLAM_C, _ACKLAM_D
+    if p < _ACKLAM_P_LOW or p > 1.0 - _ACKLAM_P_LOW:
+        # 尾部区域
+        q = math.sqrt(-2.0 * math.log(p if p < 0.5 else 1.0 - p))
+        x = (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+            ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1.0)
+        if p >= 0.5:
+            x = -x
+    else:
+        # 中心区域
+        q = p - 0.5
+        r = q * q
+        x = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+            (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1.0)
+
+    # p 极小（次正规数）时 |x| 约 > 37，exp(x²/2) 会溢出，直接返回 Acklam 初值
+    if p < _HALLEY_P_MIN:
+        return x
+
+    # Halley 迭代一步
+    e = 0.5 * math.erfc(-x / _SQRT_2) - p
+    u = e * _SQRT_2PI * math.exp(0.5 * x * x)
+    return x - u / (1.0 + 0.5 * x * u)
+
+RISK_FREE_RATE = 0.05  # 假设无风险利率 5%
+
+def _bs_terms(days_to_exp: int, iv: float) -> tuple:
+    """预先计算与目标 Delta 无关的 Black-Scholes 项: (σ√T, (r + σ²/2)T)"""
     if days_to_exp <= 0:
         days_to_exp = 1
 
     T = days_to_exp / 365.0
-    r = 0.05  # 假设无风险利率 5%
-    sigma = iv
-
-    # 根据 Delta 计算 d1
-    if is_call:
-        # Call Delta = N(d1), so d1 = N^(-1)(Delta)
-        d1 = norm.ppf(target_delta)
-    else:
-        # Put Delta = N(d1) - 1, so d1 = N^(-1)(Delta + 1)
-        d1 = norm.ppf(target_delta + 1)
+    sv = iv * math.sqrt(T)
+    drift = (RISK_FREE_RATE + 0.5 * iv * iv) * T
+    return sv, drift
 
-    # 反推 K: K = S * exp(-(d1 * σ√T - (r + σ²/2)T))
-    sqrt_T = math.sqrt(T)
-    K = stock_price * math.exp(-(d1 * sigma * sqrt_T - (r + sigma**2 / 2) * T))
-
-    return K
+def _K_from_d1(stock_price: float, d1: float, sv: float, drift: float) -> float:
+    """反推 K: K = S * exp(-(d1 * σ√T - (r + σ²/2)T))"""
+    return stock_price * math.exp(-(d1 * sv - drift))
 
 def estimate_strike_range_for_delta(stock_price: float, min_delta: float, max_delta: float,
                                     days_to_exp: int, iv: float = 0.3, is_call: bool = True) -> tuple:
     """
-    估算给定 Delta 范围对应的 Strike 范围
+    使用 Black-Scholes 公式估算给定 Delta 范围对应的 Strike 范围
+
+    Delta = N(d1) for Call, Delta = N(d1) - 1 for Put
+    d1 = (ln(S/K) + (r + σ²/2)T) / (σ√T)
+    反推: K = S * exp(-(d1 * σ√T - (r + σ²/2)T))
 
     Call: Delta 随 Strike 增加而减小 (高 Delta = 低 Strike)
     Put: Delta (绝对值) 随 Strike 增加而减小 (高 |Delta| = 高 Strike)
     """
+    # 只有目标 Delta 不同，其余项只算一次
+    sv, drift = _bs_terms(days_to_exp, iv)
+
     if is_call:
         # Call: max_delta 对应较低的 strike, min_delta 对应较高的 strike
-        strike_low = estimate_strike_from_delta(stock_price, max_delta, days_to_exp, iv, True)
-        strike_high = estimate_strike_from_delta(stock_price, min_delta, days_to_exp, iv, True)
+        d1_pair = (_inv_norm(max_delta), _inv_norm(min_delta))
     else:
-        # Put: 用负数 delta
+        # Put Delta = N(d1) - 1, 用负数 delta
         # min_delta 的绝对值较小 = 更 OTM = 较低 strike
         # max_delta 的绝对值较大 = 更 ITM = 较高 strike
-        strike_low = estimate_strike_from_delta(stock_price, -max_delta, days_to_exp, iv, False)
-        strike_high = estimate_strike_from_delta(stock_price, -min_delta, days_to_exp, iv, False)
+        d1_pair = (_inv_norm(1.0 - max_delta), _inv_norm(1.0 - min_delta))
+
+    k1 = _K_from_d1(stock_price, d1_pair[0], sv, drift)
+    k2 = _K_from_d1(stock_price, d1_pair[1], sv, drift)
 
     # 添加 buffer (±25%) - 因为估算使用默认 IV 30%，实际 IV 可能差异较大
     buffer = 0.25
-    strike_low = strike_low * (1 - buffer)
-    strike_high = strike_high * (1 + buffer)
+    strike_low = min(k1, k2) * (1 - buffer)
+    strike_high = max(k1, k2) * (1 + buffer)
 
     return (strike_low, strike_high)
 
-app = FastAPI()
+def _has_price(ticker) -> bool:
+    return bool(safe_float(ticker.last) or safe_float(ticker.close) or safe_float(ticker.bid))
+
+async def wait_for_price(ticker, timeout: float = 1.0):
+    """
+    等待 ticker 在本次 reqMktData 之后收到带有效价格 (last/close/bid) 的更新，最多等待 timeout 秒
+
+    通过 updateEvent 事件驱动，数据一到即返回，而不是固定 sleep。
+    ib_async 对同一合约在整个连接期间复用同一个 Ticker，其中可能仍保留上一次快照的价格，
+    因此不能直接检查现有字段，必须等待新的更新；调用方需在 reqMktData 之后立即调用。
+    """
+    evt = asyncio.Event()
+
+    def on_update(t):
+        if _has_price(t):
+            evt.set()
+
+    ticker.updateEvent += on_update
+    try:
+        await asyncio.wait_for(evt.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        ticker.updateEvent -= on_update
+    return ticker
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化响应，数值密集的期权链数据编码更快"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS 配置 - 允许前端跨域访问
 app.add_middleware(
@@ -87,6 +215,97 @@ app.add_middleware(
 # Global IB instance
 ib = IB()
 
+# 按 symbol 缓存期权链参数和股价，避免每次请求都向 TWS 重复查询
+# 期权链参数（到期日/行权价）按天变化，股价按秒变化
+PARAMS_CACHE_TTL = 3600  # 1 小时
+PRICE_CACHE_TTL = 60     # 60 秒
+_params_cache: dict = {}  # symbol -> (timestamp, chains)
+_price_cache: dict = {}   # symbol -> (timestamp, price)
+_conid_cache: dict = {}   # symbol -> (timestamp, 已 qualify 的 Stock)，conId 不会变化，不过期
+_cache_locks: dict = {}   # (cache id, symbol) -> asyncio.Lock
+
+async def cached_or_fetch(cache: dict, key: str, ttl: float, fetch):
+    """
+    从 cache 读取未过期的值，否则调用 fetch() 获取并缓存
+
+    同一 key 的并发未命中请求共用一把锁，只会向 TWS 发起一次查询。
+    空结果（如获取不到价格）不缓存。
+    """
+    entry = cache.get(key)
+    if entry and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+
+    lock_key = (id(cache), key)
+    lock = _cache_locks.get(lock_key)
+    if lock is None:
+        lock = _cache_locks[lock_key] = asyncio.Lock()
+    async with lock:
+        entry = cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+
+        value = await fetch()
+        if value:
+            cache[key] = (time.monotonic(), value)
+        return value
+
+def merge_chain_params(chains) -> tuple:
+    """
+    合并 reqSecDefOptParams 返回的各交易所期权链参数，返回排序后的 (expirations, strikes)
+
+    优先使用 SMART；SMART 没有数据时合并所有交易所
+    """
+    smart = [c for c in chains if c.exchange == 'SMART']
+
+    # 常见情况：只有一个 SMART 链，其 expirations/strikes 本身无重复，无需用 set 去重
+    if len(smart) == 1 and smart[0].expirations and smart[0].strikes:
+        return sorted(smart[0].expirations), sorted(smart[0].strikes)
+
+    all_expirations = set()
+    all_strikes = set()
+    for chain in smart:
+        all_expirations.update(chain.expirations)
+        all_strikes.update(chain.strikes)
+
+    # 如果 SMART 没有数据，尝试其他交易所
+    if not all_expirations or not all_strikes:
+        for chain in chains:
+            all_expirations.update(chain.expirations)
+            all_strikes.update(chain.strikes)
+
+    return sorted(all_expirations), sorted(all_strikes)
+
+def clear_caches():
+    _params_cache.clear()
+    _conid_cache.clear()
+    _price_cache.clear()
+    _cache_locks.clear()
+
+async def get_qualified_stock(symbol: str):
+    """获取已 qualify（带 conId）的股票合约，带缓存，命中时省去一次 TWS 往返"""
+    async def fetch():
+        stock = Stock(symbol, 'SMART', 'USD')
+        await ib.qualifyContractsAsync(stock)
+        return stock if stock.conId else None
+
+    stock = await cached_or_fetch(_conid_cache, symbol, math.inf, fetch)
+    # qualify 失败时不缓存，返回未 qualify 的合约，保持原有行为
+    return stock or Stock(symbol, 'SMART', 'USD')
+
+async def get_option_params(contract):
+    """获取（已 qualify 的）股票合约的期权链参数，带缓存"""
+    async def fetch():
+        return await ib.reqSecDefOptParamsAsync(contract.symbol, '', contract.secType, contract.conId)
+    return await cached_or_fetch(_params_cache, contract.symbol, PARAMS_CACHE_TTL, fetch)
+
+async def get_stock_price(contract) -> float:
+    """获取股票当前价格，带缓存；获取不到时返回 0"""
+    async def fetch():
+        stock_ticker = ib.reqMktData(contract, '', True, False)
+        await wait_for_price(stock_ticker)  # 等待数据
+        return safe_float(stock_ticker.last) or safe_float(stock_ticker.close) or safe_float(stock_ticker.bid) or safe_float(stock_ticker.ask) or 0
+    return await cached_or_fetch(_price_cache, contract.symbol, PRICE_CACHE_TTL, fetch)
+
 class ConnectionRequest(BaseModel):
     host: str = "127.0.0.1"
     port: int = 7497
@@ -129,6 +348,7 @@ async def connect_tws(req: ConnectionRequest):
 @app.post("/disconnect")
 def disconnect_tws():
     ib.disconnect()
+    clear_caches()
     return {"message": "Disconnected"}
 
 @app.get("/search/{symbol}")
@@ -147,7 +367,7 @@ async def search_contract(symbol: str):
     
     # Request market data (snapshot)
     ticker = ib.reqMktData(c, '', True, False)
-    await asyncio.sleep(1) # Wait a bit for data
+    await wait_for_price(ticker)
     
     return {
         "conId": c.conId,
@@ -164,45 +384,26 @@ async def get_option_expirations(symbol: str):
     if not ib.isConnected():
         raise HTTPException(status_code=400, detail="Not connected to TWS")
 
-    contract = Stock(symbol, 'SMART', 'USD')
-
     # We need to qualify the contract to get the conId
-    await ib.qualifyContractsAsync(contract)
+    contract = await get_qualified_stock(symbol)
 
-    # 获取股票实时价格
-    stock_ticker = ib.reqMktData(contract, '', True, False)
-    await asyncio.sleep(1)  # 等待数据
-    stock_price = safe_float(stock_ticker.last) or safe_float(stock_ticker.close) or safe_float(stock_ticker.bid) or safe_float(stock_ticker.ask) or 0
+    # 股票实时价格和期权链参数互不依赖，并发获取
+    stock_price, chains = await asyncio.gather(get_stock_price(contract), get_option_params(contract))
     print(f"[DEBUG] {symbol}: Stock price = {stock_price}")
 
-    # Get option chain parameters
-    chains = await ib.reqSecDefOptParamsAsync(contract.symbol, '', contract.secType, contract.conId)
-
     # Combine all expirations from all exchanges (SMART usually aggregates, but reqSecDefOptParams returns per exchange)
     # We mainly care about SMART or the main exchange.
 
-    all_expirations = set()
-    all_strikes = set()
-
-    for chain in chains:
-        if chain.exchange == 'SMART':
-            all_expirations.update(chain.expirations)
-            all_strikes.update(chain.strikes)
-
-    # 如果 SMART 没有数据，尝试其他交易所
-    if not all_expirations:
-        for chain in chains:
-            all_expirations.update(chain.expirations)
-            all_strikes.update(chain.strikes)
+    all_expirations, all_strikes = merge_chain_params(chains)
 
     return {
         "symbol": symbol,
         "stockPrice": stock_price,
-        "expirations": sorted(list(all_expirations)),
-        "strikes": sorted(list(all_strikes))
+        "expirations": all_expirations,
+        "strikes": all_strikes
     }
 
-@app.post("/options/chain")
+@app.post("/options/chain", response_class=ORJSONResponse)
 async def get_option_chain(req: OptionChainRequest):
     """
     获取期权链数据，包含 Bid/Ask 和 Greeks (Delta, Gamma, Theta, Vega, IV)
@@ -211,30 +412,14 @@ async def get_option_chain(req: OptionChainRequest):
         raise HTTPException(status_code=400, detail="Not connected to TWS")
 
     # 1. 获取标的股票信息和当前价格
-    stock = Stock(req.symbol, 'SMART', 'USD')
-    await ib.qualifyContractsAsync(stock)
-
-    # 2. 先获取期权链参数（需要用到 strikes 来估算价格）
-    chains = await ib.reqSecDefOptParamsAsync(stock.symbol, '', stock.secType, stock.conId)
-    all_strikes = set()
-    for chain in chains:
-        if chain.exchange == 'SMART':
-            all_strikes.update(chain.strikes)
+    stock = await get_qualified_stock(req.symbol)
 
-    if not all_strikes:
-        # 如果 SMART 没有，尝试其他交易所
-        for chain in chains:
-            all_strikes.update(chain.strikes)
-
-    sorted_strikes = sorted(all_strikes)
+    # 2. 并发获取期权链参数（需要用到 strikes 来估算价格）和股票当前价格（用于判断 ITM/OTM）
+    chains, stock_price = await asyncio.gather(get_option_params(stock), get_stock_price(stock))
+    _, sorted_strikes = merge_chain_params(chains)
     print(f"[DEBUG] {req.symbol}: Found {len(sorted_strikes)} strikes, range: {sorted_strikes[0] if sorted_strikes else 'N/A'} - {sorted_strikes[-1] if sorted_strikes else 'N/A'}")
 
-    # 3. 获取股票当前价格用于判断 ITM/OTM
-    stock_ticker = ib.reqMktData(stock, '', True, False)
-    await asyncio.sleep(1)  # 增加等待时间
-    stock_price = safe_float(stock_ticker.last) or safe_float(stock_ticker.close) or safe_float(stock_ticker.bid) or safe_float(stock_ticker.ask) or 0
-
-    # 如果还是获取不到价格，用 strikes 的中位数估算
+    # 3. 如果获取不到价格，用 strikes 的中位数估算
     if stock_price == 0 and sorted_strikes:
         stock_price = sorted_strikes[len(sorted_strikes) // 2]
         print(f"[DEBUG] {req.symbol}: Using estimated price from strikes: {stock_price}")
@@ -268,7 +453,7 @@ async def get_option_chain(req: OptionChainRequest):
                 strike_low, strike_high = estimate_strike_range_for_delta(
                     stock_price, req.min_delta, req.max_delta, days_to_exp, estimated_iv, True
                 )
-                strikes_to_query = [s for s in sorted_strikes if strike_low <= s <= strike_high]
+                strikes_to_query = strikes_in_range(sorted_strikes, strike_low, strike_high)
                 print(f"[DEBUG] {req.symbol}: Delta filter (Call): estimated strike range {strike_low:.2f} - {strike_high:.2f}, found {len(strikes_to_query)} strikes")
 
             elif req.option_type == "put":
@@ -276,7 +461,7 @@ async def get_option_chain(req: OptionChainRequest):
                 strike_low, strike_high = estimate_strike_range_for_delta(
                     stock_price, req.min_delta, req.max_delta, days_to_exp, estimated_iv, False
                 )
-                strikes_to_query = [s for s in sorted_strikes if strike_low <= s <= strike_high]
+                strikes_to_query = strikes_in_range(sorted_strikes, strike_low, strike_high)
                 print(f"[DEBUG] {req.symbol}: Delta filter (Put): estimated strike range {strike_low:.2f} - {strike_high:.2f}, found {len(strikes_to_query)} strikes")
 
             else:
@@ -290,14 +475,14 @@ async def get_option_chain(req: OptionChainRequest):
                 # 取并集
                 combined_low = min(call_low, put_low)
                 combined_high = max(call_high, put_high)
-                strikes_to_query = [s for s in sorted_strikes if combined_low <= s <= combined_high]
+                strikes_to_query = strikes_in_range(sorted_strikes, combined_low, combined_high)
                 print(f"[DEBUG] {req.symbol}: Delta filter (All): Call range {call_low:.2f}-{call_high:.2f}, Put range {put_low:.2f}-{put_high:.2f}, combined {len(strikes_to_query)} strikes")
 
             # 如果筛选后没有 strike，fallback 到 ATM 附近
             if not strikes_to_query:
                 print(f"[DEBUG] {req.symbol}: Delta filter returned no strikes, falling back to ATM")
                 half = 15
-                atm_idx = min(range(len(sorted_strikes)), key=lambda i: abs(sorted_strikes[i] - stock_price))
+                atm_idx = find_atm_index(sorted_strikes, stock_price)
                 start_idx = max(0, atm_idx - half)
                 end_idx = min(len(sorted_strikes), atm_idx + half + 1)
                 strikes_to_query = sorted_strikes[start_idx:end_idx]
@@ -308,27 +493,28 @@ async def get_option_chain(req: OptionChainRequest):
         else:
             # 找到 ATM 附近的行权价（根据 num_strikes 参数）
             half = req.num_strikes // 2
-            atm_idx = min(range(len(sorted_strikes)), key=lambda i: abs(sorted_strikes[i] - stock_price))
+            atm_idx = find_atm_index(sorted_strikes, stock_price)
             start_idx = max(0, atm_idx - half)
             end_idx = min(len(sorted_strikes), atm_idx + half + 1)
             strikes_to_query = sorted_strikes[start_idx:end_idx]
     else:
-        strikes_to_query = req.strikes
+        strikes_to_query = sorted(req.strikes)
 
     print(f"[DEBUG] {req.symbol}: Querying {len(strikes_to_query)} strikes: {strikes_to_query[:5]}{'...' if len(strikes_to_query) > 5 else ''}")
 
     # 3. 构建期权合约列表 (Call 和 Put)
-    option_contracts = []
-    for strike in strikes_to_query:
-        for right in ['C', 'P']:
-            opt = Option(req.symbol, req.expiration, strike, right, 'SMART')
-            option_contracts.append(opt)
+    # 按 right 分组、按行权价顺序构建，后续结果天然有序，无需再排序
+    call_contracts = [Option(req.symbol, req.expiration, strike, 'C', 'SMART') for strike in strikes_to_query]
+    put_contracts = [Option(req.symbol, req.expiration, strike, 'P', 'SMART') for strike in strikes_to_query]
+    option_contracts = call_contracts + put_contracts
 
     # 批量验证合约
     await ib.qualifyContractsAsync(*option_contracts)
 
     # 统计有效合约数量
-    valid_contracts = [opt for opt in option_contracts if opt.conId]
+    valid_calls = [opt for opt in call_contracts if opt.conId]
+    valid_puts = [opt for opt in put_contracts if opt.conId]
+    valid_contracts = valid_calls + valid_puts
     print(f"[DEBUG] {req.symbol}: Created {len(option_contracts)} contracts, {len(valid_contracts)} are valid")
 
     # 4. 请求市场数据
@@ -339,39 +525,56 @@ async def get_option_chain(req: OptionChainRequest):
     use_streaming = req.need_greeks
     print(f"[DEBUG] {req.symbol}: need_greeks={req.need_greeks}, use_streaming={use_streaming}")
 
-    tickers = []
-    for opt in option_contracts:
-        if opt.conId:  # 只请求有效合约
-            if use_streaming:
-                ticker = ib.reqMktData(opt, '106', False, False)  # 流式模式获取 Greeks
-            else:
-                ticker = ib.reqMktData(opt, '', True, False)  # 快照模式只获取 bid/ask
-            tickers.append((opt, ticker))
+    # 只请求有效合约
+    # 流式模式请求 106 (impliedVol) 获取 Greeks；快照模式只获取 bid/ask
+    generic_ticks = '106' if use_streaming else ''
+    snapshot = not use_streaming
+    tks = [ib.reqMktData(opt, generic_ticks, snapshot, False) for opt in valid_contracts]
 
-    print(f"[DEBUG] {req.symbol}: Requesting market data for {len(tickers)} contracts (streaming={use_streaming})")
+    print(f"[DEBUG] {req.symbol}: Requesting market data for {len(tks)} contracts (streaming={use_streaming})")
 
     # 等待数据返回
     start_time = asyncio.get_event_loop().time()
 
     if use_streaming:
+        # ib_async 对同一合约复用同一个 Ticker，cancelMktData 也不会清空其字段，
+        # 重复请求时 Ticker 上仍保留上次订阅的 bid/Greeks。
+        # 记录请求时的字段对象，只统计本次请求之后新到达（对象已被替换）的数据
+        prev_bids = [t.bid for t in tks]
+        prev_greeks = [t.modelGreeks for t in tks]
+
         # 流式模式：等待 Greeks 数据
         max_wait_time = 30  # 最多等待 30 秒
         min_wait_time = 3   # 最少等待 3 秒（给 Greeks 时间返回）
 
+        # 轮询间隔指数退避 (0.1s -> 0.5s)：Greeks 返回快时尽早退出，返回慢时减少轮询开销
+        delay = 0.1
         while True:
-            await asyncio.sleep(0.5)
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.6, 0.5)
             elapsed = asyncio.get_event_loop().time() - start_time
 
-            ready_count = sum(1 for _, t in tickers if t.bid is not None and t.bid != -1)
-            greeks_count = sum(1 for _, t in tickers if t.modelGreeks is not None)
+            # 单次遍历同时统计新到达的 bid/ask 和 Greeks 数量
+            ready_count = greeks_count = 0
+            for t, prev_bid, prev_mg in zip(tks, prev_bids, prev_greeks):
+                bid = t.bid
+                if bid is not prev_bid and bid is not None and bid != -1:
+                    ready_count += 1
+                mg = t.modelGreeks
+                if mg is not prev_mg and mg is not None:
+                    greeks_count += 1
 
-            print(f"[DEBUG] {req.symbol}: Waiting... {elapsed:.1f}s - {ready_count}/{len(tickers)} have bid/ask, {greeks_count}/{len(tickers)} have Greeks")
+            print(f"[DEBUG] {req.symbol}: Waiting... {elapsed:.1f}s - {ready_count}/{len(tks)} have bid/ask, {greeks_count}/{len(tks)} have Greeks")
 
             if elapsed >= max_wait_time:
                 break
 
+            # 全部合约都已收到新的 bid/ask 和 Greeks，无需等到 min_wait_time
+            if greeks_count == len(tks) and ready_count == len(tks):
+                break
+
             if elapsed >= min_wait_time:
-                if greeks_count >= len(tickers) * 0.5:
+                if greeks_count >= len(tks) * 0.5:
                     break
     else:
         # 快照模式：只等待 bid/ask 数据，速度更快
@@ -381,14 +584,18 @@ async def get_option_chain(req: OptionChainRequest):
             await asyncio.sleep(0.3)
             elapsed = asyncio.get_event_loop().time() - start_time
 
-            ready_count = sum(1 for _, t in tickers if t.bid is not None and t.bid != -1)
-            print(f"[DEBUG] {req.symbol}: Waiting (snapshot)... {elapsed:.1f}s - {ready_count}/{len(tickers)} have bid/ask")
+            ready_count = 0
+            for t in tks:
+                bid = t.bid
+                if bid is not None and bid != -1:
+                    ready_count += 1
+            print(f"[DEBUG] {req.symbol}: Waiting (snapshot)... {elapsed:.1f}s - {ready_count}/{len(tks)} have bid/ask")
 
             if elapsed >= max_wait_time:
                 break
 
             # 快照模式：80% 有数据就退出
-            if ready_count >= len(tickers) * 0.8:
+            if ready_count >= len(tks) * 0.8:
                 break
 
     elapsed = asyncio.get_event_loop().time() - start_time
@@ -396,40 +603,17 @@ async def get_option_chain(req: OptionChainRequest):
 
     # 取消市场数据订阅（流式模式需要取消）
     if use_streaming:
-        for opt, ticker in tickers:
+        for opt in valid_contracts:
             ib.cancelMktData(opt)
 
     # 5. 整理返回数据
-    calls = []
-    puts = []
-
-    for opt, ticker in tickers:
-        option_data = {
-            "strike": opt.strike,
-            "expiration": opt.lastTradeDateOrContractMonth,
-            "bid": safe_float(ticker.bid if ticker.bid != -1 else None),
-            "ask": safe_float(ticker.ask if ticker.ask != -1 else None),
-            "last": safe_float(ticker.last if ticker.last != -1 else None),
-            "volume": safe_float(ticker.volume) if ticker.volume != -1 else 0,
-            "openInterest": safe_float(ticker.callOpenInterest if opt.right == 'C' else ticker.putOpenInterest),
-            # Greeks
-            "delta": safe_float(ticker.modelGreeks.delta) if ticker.modelGreeks else None,
-            "gamma": safe_float(ticker.modelGreeks.gamma) if ticker.modelGreeks else None,
-            "theta": safe_float(ticker.modelGreeks.theta) if ticker.modelGreeks else None,
-            "vega": safe_float(ticker.modelGreeks.vega) if ticker.modelGreeks else None,
-            "iv": safe_float(ticker.modelGreeks.impliedVol) if ticker.modelGreeks else None,
-            # ITM/OTM 状态
-            "itm": (opt.right == 'C' and stock_price > opt.strike) or (opt.right == 'P' and stock_price < opt.strike)
-        }
-
-        if opt.right == 'C':
-            calls.append(option_data)
-        else:
-            puts.append(option_data)
-
-    # 按行权价排序
-    calls.sort(key=lambda x: x['strike'])
-    puts.sort(key=lambda x: x['strike'])
+    # tks 与 valid_contracts 一一对应：前段为 Call，后段为 Put，均已按行权价排序
+    # 按段整体处理，ITM 判断不再需要逐行区分 Call/Put
+    n_calls = len(valid_calls)
+    calls = [_option_row(opt, ticker, True, stock_price > opt.strike)
+             for opt, ticker in zip(valid_calls, tks[:n_calls])]
+    puts = [_option_row(opt, ticker, False, stock_price < opt.strike)
+            for opt, ticker in zip(valid_puts, tks[n_calls:])]
 
     return {
         "symbol": req.symbol,